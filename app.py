@@ -2,7 +2,12 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
+import hmac
+import json
 import random
+import re
+import threading
+import zlib
 import requests  # For GitLab API calls
 from datetime import datetime  # For timestamping attempts
 import os
@@ -164,15 +169,179 @@ QUESTIONS_DB = [
     }
 ]
 
+# --- 1b. NEAR-DUPLICATE DETECTION (MinHash + LSH) ---
+# Each question is reduced to character shingles of its text and options, summarised by a
+# MinHash signature and bucketed by LSH bands. Only questions sharing a bucket are compared,
+# so indexing stays near-linear even for very large banks (no all-pairs comparison).
+SHINGLE_SIZE = 5
+MINHASH_NUM_PERM = 128
+LSH_BANDS = 16 # 16 bands x 8 rows -> candidate threshold around 0.7 Jaccard
+LSH_ROWS = MINHASH_NUM_PERM // LSH_BANDS
+DUPLICATE_THRESHOLD = 0.8 # Estimated Jaccard similarity at which two questions are flagged
+_MINHASH_PRIME = np.uint64((1 << 31) - 1)
+_minhash_rng = np.random.default_rng(seed=42) # Fixed seed so signatures are stable across runs
+_MINHASH_A = _minhash_rng.integers(1, (1 << 31) - 1, size=MINHASH_NUM_PERM, dtype=np.uint64)
+_MINHASH_B = _minhash_rng.integers(0, (1 << 31) - 1, size=MINHASH_NUM_PERM, dtype=np.uint64)
+
+REQUIRED_QUESTION_FIELDS = ("id", "topic", "difficulty", "text", "options", "correct_answer", "explanation")
+VALID_DIFFICULTIES = ("Low", "Medium", "High")
+
+def new_duplicate_index():
+    """Returns an empty near-duplicate index.
+
+    `parent` maps every indexed id to its cluster's canonical id, `members` maps each canonical id to
+    its cluster, and `order` records insertion order."""
+    return {"buckets": {}, "signatures": {}, "parent": {}, "members": {}, "order": {}}
+
+def _normalize_text(text):
+    # Unicode-aware; keeps punctuation that tells Git arguments apart (HEAD~1 vs HEAD^, `git add .`)
+    return re.sub(r"\s+", " ", re.sub(r"[^\w<>\-.~^/@:=+*]+", " ", str(text).lower())).strip()
+
+def question_shingles(question):
+    """Character shingles over the normalized question text and its (sorted) options.
+    Returns an empty set if nothing meaningful is left after normalization."""
+    parts = [question.get("text", "")] + sorted(question.get("options", []))
+    # Normalize each part on its own so the " | " separator keeps text/option boundaries
+    normalized = " | ".join(part for part in (_normalize_text(p) for p in parts) if part)
+    if not normalized:
+        return set()
+    if len(normalized) <= SHINGLE_SIZE:
+        return {normalized}
+    return {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+
+def minhash_signature(shingles):
+    """MinHash signature of a shingle set using universal hashing (a*x + b) mod p."""
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (np.outer(hashes, _MINHASH_A) + _MINHASH_B) % _MINHASH_PRIME
+    return permuted.min(axis=0)
+
+def _signature_similarity(index, question_id, signature):
+    return float(np.mean(index["signatures"][question_id] == signature))
+
+def index_question(question, index):
+    """Adds one question to the index and flags it as a near-duplicate if it matches an existing cluster.
+
+    A question only joins a cluster if it is similar to that cluster's canonical question, and clusters
+    are never merged, so questions that are already indexed are never re-flagged. If several clusters
+    qualify, the earliest indexed canonical question wins. Sets `question["duplicate_of"]` to that
+    canonical id, or None if the question is unique, and returns it. Questions whose text and options
+    are empty after normalization are registered but never compared. Raises ValueError if the id is
+    missing or already indexed."""
+    if question.get("id") is None:
+        raise ValueError(f"Question has no 'id': {str(question.get('text', ''))[:60]!r}")
+    question_id = question["id"]
+    if question_id in index["parent"]:
+        raise ValueError(f"Question id {question_id!r} is already in the question bank.")
+
+    index["order"][question_id] = len(index["order"])
+    index["parent"][question_id] = question_id
+    question["duplicate_of"] = None
+
+    shingles = question_shingles(question)
+    if not shingles:
+        index["members"][question_id] = [question_id]
+        return None
+    signature = minhash_signature(shingles)
+
+    band_keys = [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()) for band in range(LSH_BANDS)]
+    candidates = set()
+    for key in band_keys:
+        candidates.update(index["buckets"].get(key, ()))
+
+    matching_roots = set()
+    for candidate_id in candidates:
+        if _signature_similarity(index, candidate_id, signature) >= DUPLICATE_THRESHOLD:
+            root = index["parent"][candidate_id]
+            if root == candidate_id or _signature_similarity(index, root, signature) >= DUPLICATE_THRESHOLD:
+                matching_roots.add(root)
+
+    index["signatures"][question_id] = signature
+    for key in band_keys:
+        index["buckets"].setdefault(key, []).append(question_id)
+
+    if matching_roots:
+        root = min(matching_roots, key=index["order"].get)
+        index["parent"][question_id] = root
+        index["members"][root].append(question_id)
+        question["duplicate_of"] = root
+    else:
+        index["members"][question_id] = [question_id]
+    return question["duplicate_of"]
+
+def build_question_store(questions):
+    """Builds a question store (question list, duplicate index and import lock) from a list of questions."""
+    store = {"questions": [], "index": new_duplicate_index(), "lock": threading.Lock()}
+    add_questions_to_db(questions, store)
+    return store
+
+@st.cache_resource
+def load_question_store():
+    """Question store shared by all sessions, built once per server process so imports and the index
+    survive reruns. It lives in memory only and is rebuilt from QUESTIONS_DB on restart."""
+    return build_question_store([dict(q) for q in QUESTIONS_DB])
+
+def validate_question(question):
+    """Raises ValueError if a question to import is malformed."""
+    if not isinstance(question, dict):
+        raise ValueError(f"Each question must be an object, got {type(question).__name__}.")
+    question_id = question.get("id", "<no id>")
+    missing = [field for field in REQUIRED_QUESTION_FIELDS if question.get(field) is None]
+    if missing:
+        raise ValueError(f"Question {question_id!r} is missing: {', '.join(missing)}")
+    if isinstance(question["id"], bool) or not isinstance(question["id"], (int, str)):
+        raise ValueError(f"Question id {question_id!r} must be an integer or a string.")
+    for field in ("topic", "text", "explanation"):
+        if not isinstance(question[field], str):
+            raise ValueError(f"Question {question_id!r}: '{field}' must be a string.")
+    if question["difficulty"] not in VALID_DIFFICULTIES:
+        raise ValueError(f"Question {question_id!r}: 'difficulty' must be one of {', '.join(VALID_DIFFICULTIES)}.")
+    options = question["options"]
+    if not isinstance(options, list) or not options or not all(isinstance(option, str) for option in options):
+        raise ValueError(f"Question {question_id!r}: 'options' must be a non-empty list of strings.")
+    if question["correct_answer"] not in options:
+        raise ValueError(f"Question {question_id!r}: 'correct_answer' must be one of its options.")
+
+def add_questions_to_db(new_questions, store=None):
+    """Imports questions into the question store, indexing each one incrementally.
+
+    The whole batch is validated first, so a ValueError (malformed questions, missing or repeated
+    ids) leaves the store unchanged. Returns a list of (new_question_id, canonical_question_id) pairs
+    for the questions flagged as near-duplicates."""
+    store = load_question_store() if store is None else store
+    with store["lock"]:
+        index = store["index"]
+        seen_ids = set()
+        for question in new_questions:
+            validate_question(question)
+            if question["id"] in index["parent"] or question["id"] in seen_ids:
+                raise ValueError(f"Question id {question['id']!r} is already in the question bank.")
+            seen_ids.add(question["id"])
+
+        flagged = []
+        for question in new_questions:
+            store["questions"].append(question)
+            duplicate_of = index_question(question, index)
+            if duplicate_of is not None:
+                flagged.append((question["id"], duplicate_of))
+        return flagged
+
+def get_duplicate_clusters(store=None):
+    """Near-duplicate clusters as {canonical_id: [member ids in insertion order]} (only clusters of size > 1)."""
+    store = load_question_store() if store is None else store
+    return {root: list(members) for root, members in store["index"]["members"].items() if len(members) > 1}
+
 # --- HELPER FUNCTION TO GET QUIZ QUESTIONS ---
-def get_quiz_questions(num_questions=15):
+def get_quiz_questions(num_questions=15, store=None):
+    store = load_question_store() if store is None else store
     # Ensure questions are available
-    if not QUESTIONS_DB:
+    if not store["questions"]:
         return []
 
-    low_diff = [q for q in QUESTIONS_DB if q['difficulty'] == 'Low']
-    medium_diff = [q for q in QUESTIONS_DB if q['difficulty'] == 'Medium']
-    high_diff = [q for q in QUESTIONS_DB if q['difficulty'] == 'High']
+    # Skip flagged near-duplicates so repeated concepts aren't over-represented
+    unique_questions = [q for q in store["questions"] if q.get('duplicate_of') is None]
+    low_diff = [q for q in unique_questions if q['difficulty'] == 'Low']
+    medium_diff = [q for q in unique_questions if q['difficulty'] == 'Medium']
+    high_diff = [q for q in unique_questions if q['difficulty'] == 'High']
     
     random.shuffle(low_diff)
     random.shuffle(medium_diff)
@@ -529,11 +698,56 @@ def display_results():
         initialize_session_state() # Re-initialize all other states to default
         st.rerun()
 
+# --- QUESTION IMPORT ---
+def get_quiz_admin_token():
+    """Token that unlocks question import, from QUIZ_ADMIN_TOKEN.
+    Prioritizes st.secrets, then falls back to environment variables. None if not configured."""
+    admin_token = None
+    try:
+        if hasattr(st, 'secrets'):
+            admin_token = st.secrets.get("QUIZ_ADMIN_TOKEN")
+    except Exception: # Missing or malformed secrets file; fall back to .env
+        admin_token = None
+    return admin_token or os.getenv("QUIZ_ADMIN_TOKEN") or None
+
+def display_question_importer():
+    """Sidebar form for importing questions from a JSON file into the question store shared by all sessions.
+    Imported questions are checked for near-duplicates as they are added. Hidden unless QUIZ_ADMIN_TOKEN
+    is configured, and every import must supply that token (GitLab usernames are not authenticated)."""
+    admin_token = get_quiz_admin_token()
+    if not admin_token:
+        return
+    with st.sidebar.expander("📥 Import Questions"):
+        with st.form(key="question_import_form", clear_on_submit=True):
+            uploaded_file = st.file_uploader("Questions JSON (a list of question objects)", type=["json"])
+            token_input = st.text_input("Admin token", type="password")
+            import_button = st.form_submit_button(label="Import")
+
+        if import_button:
+            if not hmac.compare_digest(token_input.encode("utf-8"), str(admin_token).encode("utf-8")):
+                st.error("Import failed: invalid admin token.")
+                return
+            if uploaded_file is None:
+                st.warning("Please choose a JSON file to import.")
+                return
+            try:
+                new_questions = json.load(uploaded_file)
+                if not isinstance(new_questions, list):
+                    raise ValueError("Expected a JSON list of question objects.")
+                flagged = add_questions_to_db(new_questions)
+            except ValueError as e: # Also covers json.JSONDecodeError and failed validation
+                st.error(f"Import failed: {e}")
+            else:
+                st.success(f"Imported {len(new_questions)} question(s), {len(flagged)} flagged as near-duplicates.")
+                for new_id, canonical_id in flagged:
+                    st.caption(f"Question {new_id} is a near-duplicate of question {canonical_id} and will be skipped in quizzes.")
+
 # --- MAIN APP LAYOUT ---
 def main():
     st.set_page_config(layout="wide", page_title="Git & GitLab QuizBot")
     local_css("style.css") # Apply custom CSS from style.css
     initialize_session_state() # Initialize/load all session states
+    display_question_importer() # Sidebar: admin-only import of extra questions into the shared bank
 
     st.markdown("<h1 style='text-align: center; color: #0056b3;'>🎓 Git & GitLab Tech Quiz 🚀</h1>", unsafe_allow_html=True)
 
@@ -0,0 +1,157 @@
+import copy
+import random
+
+import pytest
+
+import app
+
+BASE_TEXT = "which command lists every local branch with its latest commit"
+
+
+def make_question(question_id, text, options=("git branch -v", "git status"), difficulty="Low"):
+    return {
+        "id": question_id, "topic": "Branching", "difficulty": difficulty,
+        "text": text, "options": list(options), "correct_answer": options[0],
+        "explanation": "Test question.",
+    }
+
+
+def reworded_copy(question, new_id):
+    duplicate = copy.deepcopy(question)
+    duplicate["id"] = new_id
+    duplicate["text"] = duplicate["text"].replace("What is", "What's").replace("Which", "Which Git")
+    return duplicate
+
+
+def test_base_bank_has_no_duplicates():
+    store = app.build_question_store(copy.deepcopy(app.QUESTIONS_DB))
+    assert app.get_duplicate_clusters(store) == {}
+    assert all(q["duplicate_of"] is None for q in store["questions"])
+
+
+def test_reworded_question_is_flagged_against_earliest():
+    store = app.build_question_store(copy.deepcopy(app.QUESTIONS_DB))
+    original = store["questions"][0]
+    flagged = app.add_questions_to_db([reworded_copy(original, 100)], store)
+    assert flagged == [(100, original["id"])]
+    assert app.get_duplicate_clusters(store) == {original["id"]: [original["id"], 100]}
+
+
+def test_different_question_is_not_flagged():
+    store = app.build_question_store([make_question(1, BASE_TEXT)])
+    flagged = app.add_questions_to_db([make_question(2, "How do you undo the last pushed commit without rewriting history?")], store)
+    assert flagged == []
+
+
+def test_bridging_question_does_not_reflag_existing_questions():
+    store = app.build_question_store([
+        make_question(1, "in brief, " + BASE_TEXT),
+        make_question(2, BASE_TEXT + " on gitlab"),
+    ])
+    assert app.get_duplicate_clusters(store) == {} # Not similar enough on their own
+
+    flagged = app.add_questions_to_db([make_question(3, BASE_TEXT)], store)
+    assert flagged == [(3, 1)] # Matches both canonicals, earliest wins
+    assert app.get_duplicate_clusters(store) == {1: [1, 3]}
+    assert [q["duplicate_of"] for q in store["questions"]] == [None, None, 1]
+
+
+def test_drifting_rewordings_do_not_chain_into_one_cluster():
+    store = app.build_question_store([
+        make_question(1, "in brief, " + BASE_TEXT),
+        make_question(2, BASE_TEXT),
+    ])
+    assert store["questions"][1]["duplicate_of"] == 1
+
+    # Similar to question 2 but not to its canonical question 1
+    flagged = app.add_questions_to_db([make_question(3, BASE_TEXT + " on gitlab")], store)
+    assert flagged == []
+    assert app.get_duplicate_clusters(store) == {1: [1, 2]}
+
+
+def test_reimporting_existing_id_is_rejected():
+    store = app.build_question_store([make_question(1, BASE_TEXT)])
+    with pytest.raises(ValueError, match="already in the question bank"):
+        app.add_questions_to_db([make_question(1, BASE_TEXT)], store)
+    with pytest.raises(ValueError, match="already in the question bank"):
+        app.add_questions_to_db([make_question(2, "first"), make_question(2, "second")], store)
+    assert [q["id"] for q in store["questions"]] == [1]
+
+
+def test_missing_id_is_rejected():
+    store = app.build_question_store([])
+    question = make_question(1, BASE_TEXT)
+    del question["id"]
+    with pytest.raises(ValueError, match="missing: id"):
+        app.add_questions_to_db([question], store)
+    assert store["questions"] == []
+
+
+@pytest.mark.parametrize("changes, message", [
+    ({"options": 5}, "'options' must be a non-empty list of strings"),
+    ({"options": [1, "a"], "correct_answer": "a"}, "'options' must be a non-empty list of strings"),
+    ({"id": [4]}, "must be an integer or a string"),
+    ({"difficulty": "Expert"}, "'difficulty' must be one of"),
+    ({"correct_answer": "git push"}, "'correct_answer' must be one of its options"),
+    ({"text": 42}, "'text' must be a string"),
+])
+def test_malformed_question_is_rejected_without_changing_store(changes, message):
+    store = app.build_question_store([make_question(1, BASE_TEXT)])
+    snapshot = copy.deepcopy(store["index"])
+    bad_question = dict(make_question(3, "How do you delete a remote branch?"), **changes)
+    with pytest.raises(ValueError, match=message):
+        app.add_questions_to_db([make_question(2, "How do you rename a branch?"), bad_question], store)
+
+    assert [q["id"] for q in store["questions"]] == [1]
+    assert store["index"]["parent"] == snapshot["parent"]
+    assert store["index"]["members"] == snapshot["members"]
+    assert store["index"]["buckets"].keys() == snapshot["buckets"].keys()
+
+
+def test_empty_normalized_text_is_never_flagged():
+    store = app.build_question_store([make_question(1, "", options=("", ""))])
+    flagged = app.add_questions_to_db([make_question(2, "???", options=("!!", "??"))], store)
+    assert flagged == []
+    assert app.question_shingles(store["questions"][1]) == set()
+
+
+def test_non_latin_text_is_shingled():
+    question = make_question(1, "Какая команда создаёт новый репозиторий?", options=("git init", "git clone"))
+    assert any("коман" in shingle for shingle in app.question_shingles(question))
+
+
+def test_git_punctuation_is_kept_in_options():
+    with_tilde = make_question(1, "Reset to which commit?", options=("HEAD~1", "git add ."))
+    with_caret = make_question(1, "Reset to which commit?", options=("HEAD^", "git add"))
+    assert app.question_shingles(with_tilde) != app.question_shingles(with_caret)
+
+
+def test_shingles_keep_text_and_option_boundaries():
+    assert " | " in "".join(app.question_shingles(make_question(1, "git init", options=("yes", "no"))))
+
+
+def test_lsh_buckets_stay_small_for_distinct_questions():
+    # Candidates come only from shared buckets, so small buckets keep indexing near-linear
+    rng = random.Random(0)
+    words = ["".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 8))) for _ in range(2000)]
+    questions = [
+        make_question(i, " ".join(rng.choices(words, k=15)),
+                      options=tuple(" ".join(rng.choices(words, k=3)) for _ in range(4)))
+        for i in range(3000)
+    ]
+    store = app.build_question_store(questions)
+    assert app.get_duplicate_clusters(store) == {}
+    assert max(len(bucket) for bucket in store["index"]["buckets"].values()) <= 3
+
+
+def test_quiz_selection_skips_flagged_questions():
+    store = app.build_question_store(copy.deepcopy(app.QUESTIONS_DB))
+    duplicates = [reworded_copy(q, 1000 + q["id"]) for q in app.QUESTIONS_DB]
+    flagged = app.add_questions_to_db(duplicates, store)
+    flagged_ids = {new_id for new_id, _ in flagged}
+    assert flagged_ids
+
+    for _ in range(10):
+        selected = app.get_quiz_questions(15, store)
+        assert not flagged_ids & {q["id"] for q in selected}
+        assert all(q["duplicate_of"] is None for q in selected)